@@ -2,10 +2,10 @@
 from __future__ import unicode_literals
 import math
 import argparse
-import nltk
 import os
 from collections import defaultdict
 import codecs
+import corpus_cache
 
 """
 This file is part of the computer assignments for the course DD1418/DD2418 Language engineering at KTH.
@@ -21,18 +21,22 @@ class TrigramTrainer(object):
     This class constructs a trigram language model from a corpus.
     """
 
-    def process_files(self, f):
+    def process_files(self, f, cache_dir = None, sms = False):
         """
         Processes the file @code{f}.
+
+        If @code{cache_dir} is given, the tokens are read from the corpus cache
+        (see corpus_cache.py) instead of tokenizing the file again.
         """
+        if cache_dir:
+            self.tokens = corpus_cache.load(f, cache_dir, sms)
+            for token in self.tokens:
+                self.process_token(token)
+            return
         with codecs.open(f, 'r', 'utf-8') as text_file:
             #text = reader = str(text_file.read()).lower() # lower() means no capitalization.
             text = reader = str(text_file.read()) # Maintaining capitalization.
-        try :
-            self.tokens = nltk.word_tokenize(text) # Important that it is named self.tokens for the --check flag to work
-        except LookupError :
-            nltk.download('punkt')
-            self.tokens = nltk.word_tokenize(text)
+        self.tokens = corpus_cache.tokenize(text) # Important that it is named self.tokens for the --check flag to work
         for token in self.tokens:
             self.process_token(token)
 
@@ -171,12 +175,16 @@ def main():
     parser = argparse.ArgumentParser(description='TrigramTrainer')
     parser.add_argument('--file', '-f', type=str,  required=True, help='file from which to build the language model')
     parser.add_argument('--destination', '-d', type=str, help='file in which to store the language model')
+    parser.add_argument('--cache-dir', '-c', type=str, help='directory with cached tokenized corpora (see corpus_cache.py)')
+    parser.add_argument('--sms', action='store_true', help='the file is the raw SMSSpamCollection (requires --cache-dir)')
 
     arguments = parser.parse_args()
+    if arguments.sms and not arguments.cache_dir:
+        parser.error("--sms requires --cache-dir")
 
     trigram_trainer = TrigramTrainer()
 
-    trigram_trainer.process_files(arguments.file)
+    trigram_trainer.process_files(arguments.file, arguments.cache_dir, arguments.sms)
 
     stats = trigram_trainer.stats()
     if arguments.destination:
@@ -2,14 +2,15 @@ import argparse
 import codecs
 from collections import defaultdict
 from operator import itemgetter
-import nltk
 import sys
+import corpus_cache
+from vocabulary_table import VocabularyTable
 
 class WordPredictor:
     """
     This class predicts words using a language model.
     """
-    def __init__(self, filename, stats_file = None):
+    def __init__(self, filename, stats_file = None, cache_dir = None, sms = False):
 
         # The mapping from words to identifiers.
         self.index = {}
@@ -20,6 +21,9 @@ class WordPredictor:
         # An array holding the unigram counts.
         self.unigram_count = {}
 
+        # The vocabulary and unigram counts as NumPy arrays, for the unigram and spell-check fallbacks.
+        self.vocabulary = None
+
         # The bigram log-probabilities.
         self.bigram_prob = defaultdict(dict)
 
@@ -45,7 +49,7 @@ class WordPredictor:
             sys.exit()
 
         if stats_file:
-            self.stats(stats_file)
+            self.stats(stats_file, cache_dir, sms)
             sys.exit()
 
         self.welcome()
@@ -79,6 +83,7 @@ class WordPredictor:
                     first_word, second_word, third_word = self.word[int(i)], self.word[int(j)], self.word[int(k)]
                     self.trigram_prob[first_word][second_word][third_word] = float(p)
 
+                self.vocabulary = VocabularyTable(self.unigram_count)
                 return True
         except IOError:
             print("Couldn't find bigram probabilities file {}".format(filename))
@@ -151,27 +156,19 @@ class WordPredictor:
         Finds possible corrections of misspelled words.
         """
         possible_words = self.known(self.edits2(word))
-        if len(possible_words) == 0: return []
-        most_frequently_used_words = []
-
-        for i in range(self.num_words_to_recommend):
-            word = max(possible_words, key=itemgetter(1))[0] # See https://stackoverflow.com/questions/13145368/find-the-maximum-value-in-a-list-of-tuples-in-python
-            most_frequently_used_words.append(word)
-            possible_words.remove((word, self.unigram_count[word])) # So that we do not choose it again in the next iteration.
-            if len(possible_words) == 0:
-                break
-
-        return most_frequently_used_words
+        return self.vocabulary.most_frequent_of([w for (w, c) in possible_words], self.num_words_to_recommend)
 
 
 
-    def get_n_grams(self, prev_word = None, two_words_back = None, user_input = ""):
+    def get_n_grams(self, prev_word = None, two_words_back = None, user_input = "", k = None):
         """
         Returns either bigram probabilities given historical word prev_word or
         trigram probabilities given historical words two_words_back & prev_word.
         If no historical words are specified, then unigram counts are returned.
 
         Based on user_input for current word being inputted.
+
+        For unigrams, only the k most frequent words are returned if k is specified.
         """
         if prev_word and two_words_back:
             w = self.trigram_prob.get(two_words_back, "empty")
@@ -190,22 +187,30 @@ class WordPredictor:
                 possible_words = [w for (w, p) in words_and_p if w[:len(user_input)] == user_input] # Only the words that start with user_input.
                 return possible_words
         else:
-            words_and_p = [(w, p) for w, p in self.unigram_count.items()]
-            words_and_p.sort(key=itemgetter(1), reverse=True) # Sorted from highest to lowest probability.
-            possible_words = [w for (w, p) in words_and_p if w[:len(user_input)] == user_input] # Only the words that start with user_input.
-            return possible_words
+            return self.vocabulary.most_frequent(user_input, k) # Sorted from highest to lowest count.
 
         return []
 
-    def recommend_words(self, prev_word = None, two_words_back = None, user_input = "", possible_words = None):
+    def recommend_words(self, prev_word = None, two_words_back = None, user_input = "", possible_words = None, k = None):
         """
         Recommends possible words using self.get_n_grams().
 
         If user specifies possible_words as param, then the list is filtered to remove words that don't start with user_input.
         """
-        if possible_words:
+        if possible_words is not None:
             return [w for w in possible_words if w[:len(user_input)] == user_input]
-        return self.get_n_grams(prev_word, two_words_back, user_input)
+        return self.get_n_grams(prev_word, two_words_back, user_input, k)
+
+    def count_word(self, word):
+        """
+        Increments the unigram count of word, adding it to the vocabulary if it is new.
+        """
+        if word in self.unigram_count:
+            self.unigram_count[word] += 1
+            self.vocabulary.increment(word)
+        else:
+            self.unigram_count[word] = 1
+            self.vocabulary.add(word)
 
     def type_letter(self, possible_choices):
         """
@@ -227,8 +232,6 @@ class WordPredictor:
         letter = ""
         new_word = ""
 
-        check_unigram = True # Flag variable to check unigrams if possible_words is empty.
-
         if len(self.words) == 0:
             # If the user hasn't written any words yet.
             possible_words = self.recommend_words(prev_word = ".") # Get start-of-sentence probabilities (bigrams).
@@ -256,11 +259,13 @@ class WordPredictor:
                     break
 
             if len(words_to_recommend) < self.num_words_to_recommend:
-                if check_unigram:
-                    # If there are no recommended bigrams, check unigrams.
-                    possible_words += self.recommend_words(user_input = new_word)
-                    check_unigram = False
-                    continue
+                # If there are not enough recommended bigrams, fill up with the most frequent unigrams.
+                # Asking for as many extra unigrams as there are recommended words leaves enough after removing duplicates.
+                for word in self.recommend_words(user_input = new_word, k = self.num_words_to_recommend + len(words_to_recommend)):
+                    if len(words_to_recommend) == self.num_words_to_recommend:
+                        break
+                    if word not in words_to_recommend:
+                        words_to_recommend.append(word)
                 if len(words_to_recommend) == 0:
                     # Then, we know user either misspelled the word or wishes to add a new one we haven't heard of before.
                     if new_word.isalpha():
@@ -276,7 +281,7 @@ class WordPredictor:
             if letter in possible_choices:
                 number_of_word = possible_choices.index(letter)
                 chosen_word = words_to_recommend[number_of_word]
-                self.unigram_count[chosen_word] += 1
+                self.count_word(chosen_word)
                 self.words.append(chosen_word)
                 break
 
@@ -294,12 +299,12 @@ class WordPredictor:
                 if new_word not in self.index:
                     self.index[new_word] = len(self.index)
                     self.word[len(self.index)] = new_word
-                    self.unigram_count[new_word] = 1
+                    self.count_word(new_word)
                     self.words.append(new_word)
                     break
 
                 self.words.append(new_word)
-                self.unigram_count[new_word] += 1
+                self.count_word(new_word)
                 break
 
             new_word += letter
@@ -309,23 +314,27 @@ class WordPredictor:
         return False
 
 
-    def stats(self, filepath):
+    def stats(self, filepath, cache_dir = None, sms = False):
         """
         Determines number of saved keystrokes given an input file.
+
+        If cache_dir is given, the tokens are read from the corpus cache (see corpus_cache.py).
         """
         self.total_keystrokes = 0 # Number of total keystrokes required for the entire file.
         self.user_keystrokes = 0 # Number of keystrokes user had to type.
         try:
-            with open(filepath, 'r') as f:
-                text = str(f.read())
-                try:
-                    self.tokens = nltk.word_tokenize(text)
-                except LookupError:
-                    nltk.download('punkt')
-                    self.tokens = nltk.word_tokenize(text)
+            if cache_dir:
+                self.tokens = corpus_cache.load(filepath, cache_dir, sms)
+            else:
+                with codecs.open(filepath, 'r', 'utf-8') as f:
+                    text = str(f.read())
+                    self.tokens = corpus_cache.tokenize(text)
         except FileNotFoundError:
             print("File does not exist.")
             return
+        except UnicodeDecodeError:
+            print("File is not UTF-8 encoded.")
+            return
 
         print("Number of words/tokens in test file", len(self.tokens))
         n = 0 # Number of analyzed tokens from test file thus far.
@@ -342,6 +351,7 @@ class WordPredictor:
 
             self.total_keystrokes += len(token) + 1 # Add the number of keystrokes required to type out the word. Plus 1 for the space before the next token.
             user_input = ""
+            unigram_fallback = False # Whether the token is ranked among all unigrams, after the bigrams.
 
             if len(self.words) == 0:
                 # If the user hasn't written any words yet.
@@ -357,17 +367,19 @@ class WordPredictor:
                 if token_recommendation_rank <= self.num_words_to_recommend:
                     # Then we can choose the word right away.
                     self.user_keystrokes += 1 # User keystroke for choosing the recommendation.
-                    self.unigram_count[token] += 1 # Update unigram count.
+                    self.count_word(token) # Update unigram count.
                     self.words.append(token)
                     continue
             else:
-                possible_words += self.recommend_words() # Add all unigrams.
-                if token in possible_words:
-                    token_recommendation_rank = possible_words.index(token) + 1 # If rank would be recommended first or second etc (depending on probability).
+                # All unigrams are recommended after the bigrams. Rather than building that list, rank the token
+                # among the unigrams directly.
+                unigram_fallback = True
+                if token in self.vocabulary:
+                    token_recommendation_rank = len(possible_words) + self.vocabulary.rank(token) + 1 # If rank would be recommended first or second etc (depending on probability).
                     if token_recommendation_rank <= self.num_words_to_recommend:
                         # Then we can choose the word right away.
                         self.user_keystrokes += 1 # User keystroke for choosing the recommendation.
-                        self.unigram_count[token] += 1
+                        self.count_word(token)
                         self.words.append(token)
                         continue
                 else:
@@ -377,7 +389,7 @@ class WordPredictor:
                     # Add the word to our vocabulary.
                     self.index[token] = len(self.index)
                     self.word[len(self.index)] = token
-                    self.unigram_count[token] = 1
+                    self.count_word(token)
                     self.words.append(token)
                     continue
 
@@ -387,7 +399,10 @@ class WordPredictor:
 
                 possible_words = self.recommend_words(user_input = user_input, possible_words = possible_words) # Update possible words based on user_input.
 
-                token_recommendation_rank = possible_words.index(token) + 1
+                if unigram_fallback:
+                    token_recommendation_rank = len(possible_words) + self.vocabulary.rank(token, user_input) + 1
+                else:
+                    token_recommendation_rank = possible_words.index(token) + 1
                 if token_recommendation_rank <= self.num_words_to_recommend:
                     self.user_keystrokes += 1 # For choosing the recommendation.
                     self.words.append(token)
@@ -406,10 +421,14 @@ def main():
     parser = argparse.ArgumentParser(description='Word Predictor')
     parser.add_argument('--file', '-f', type=str,  required=True, help='file with language model')
     parser.add_argument('--stats', '-s', type=str, required=False, help='input a test file to run statistics on (how many keystrokes you would have saved)')
+    parser.add_argument('--cache-dir', '-c', type=str, required=False, help='directory with cached tokenized corpora for --stats (see corpus_cache.py)')
+    parser.add_argument('--sms', action='store_true', help='the stats file is the raw SMSSpamCollection (requires --cache-dir)')
 
     arguments = parser.parse_args()
+    if arguments.sms and not arguments.cache_dir:
+        parser.error("--sms requires --cache-dir")
 
-    word_predictor = WordPredictor(arguments.file, arguments.stats)
+    word_predictor = WordPredictor(arguments.file, arguments.stats, arguments.cache_dir, arguments.sms)
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,18 @@
 # Cleanses SMSSpamCollection and picks out only the text messages.
 # Each row in output file "sms.txt" contains a text message.
 
-lines = []
-with open("SMSSpamCollection.txt", "r") as f:
-    for line in f:
-        line = line[4:]
-        lines.append(line.strip())
+def clean_line(line):
+    """
+    Strips the ham/spam label from a row of SMSSpamCollection.
+    """
+    return line[4:].strip()
 
-with open("sms.txt", "w") as f:
-    for line in lines:
-        f.write(line)
-        f.write("\n")
+def main():
+    # Stream row by row instead of buffering the whole collection in memory.
+    with open("SMSSpamCollection.txt", "r") as f, open("sms.txt", "w") as out:
+        for line in f:
+            out.write(clean_line(line))
+            out.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#  -*- coding: utf-8 -*-
+import argparse
+import codecs
+import hashlib
+import mmap
+import os
+from array import array
+import nltk
+from cleanse_sms import clean_line
+
+"""
+Corpus preparation shared by TrigramTrainer and WordPredictor.
+
+A raw text file is cleaned and tokenized, and the result is stored in a cache
+directory as two files named after a hash of the file contents:
+
+    <hash>.tokens   the token ids, as a flat array of unsigned 32-bit integers.
+    <hash>.vocab    the vocabulary, one word per line (line number = token id).
+
+Running on the same corpus again memory-maps the token ids instead of tokenizing.
+"""
+
+# Bump this whenever cleaning or tokenization changes, so that old caches are not reused.
+CACHE_VERSION = "3"
+
+# Type code of the token id array (unsigned int, 4 bytes).
+TOKEN_TYPECODE = "I"
+
+# Number of bytes read at a time when hashing a corpus.
+CHUNK_SIZE = 1 << 20
+
+DEFAULT_CACHE_DIR = ".corpus_cache"
+
+
+def tokenize(text):
+    """
+    Tokenizes text with nltk, downloading the tokenizer models if needed.
+
+    The whole text is tokenized at once, since nltk splits it into sentences first and
+    treats a period at the end of the text differently from one inside it.
+    """
+    try:
+        return nltk.word_tokenize(text)
+    except LookupError:
+        nltk.download('punkt')
+        return nltk.word_tokenize(text)
+
+
+def content_hash(filename, sms = False):
+    """
+    Returns a key identifying the contents of <code>filename</code> and how it is tokenized.
+    """
+    h = hashlib.sha1()
+    # Include the nltk version, since upgrading it may change the tokens.
+    h.update(("v" + CACHE_VERSION + " nltk " + nltk.__version__ + (" sms" if sms else " text") + "\n").encode('utf-8'))
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CachedCorpus(object):
+    """
+    A tokenized corpus read from the cache. Behaves like a read-only list of tokens.
+    """
+    def __init__(self, tokens_path, vocab_path):
+        # The mapping from identifiers to words.
+        with open(vocab_path, 'rb') as f:
+            self.vocab = f.read().decode('utf-8').split('\n')[:-1]
+
+        # The token ids, memory-mapped from the cache file.
+        with open(tokens_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                self.ids = memoryview(array(TOKEN_TYPECODE))
+            else:
+                self.ids = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)).cast(TOKEN_TYPECODE)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.vocab[j] for j in self.ids[i]]
+        return self.vocab[self.ids[i]]
+
+    def __iter__(self):
+        vocab = self.vocab
+        for i in self.ids:
+            yield vocab[i]
+
+
+def read_text(filename, sms = False):
+    """
+    Reads <code>filename</code>. The raw SMSSpamCollection is cleaned row by row into the
+    same text that cleanse_sms.py writes to sms.txt.
+    """
+    if sms:
+        # Read with open() rather than codecs.open(), which would also split rows at characters
+        # such as \x0c and \u2028 that cleanse_sms.py keeps inside a message.
+        with open(filename, 'r', encoding='utf-8') as f:
+            return "".join(clean_line(line) + "\n" for line in f)
+    with codecs.open(filename, 'r', 'utf-8') as f:
+        return str(f.read())
+
+
+def build_cache(filename, tokens_path, vocab_path, sms = False):
+    """
+    Cleans and tokenizes <code>filename</code> and writes the token ids and vocabulary to the
+    given paths. The tokens are the same as when tokenizing the file without the cache.
+    """
+    index = {} # The mapping from words to identifiers.
+    vocab = [] # The mapping from identifiers to words.
+
+    ids = array(TOKEN_TYPECODE)
+    for token in tokenize(read_text(filename, sms)):
+        if token not in index:
+            index[token] = len(vocab)
+            vocab.append(token)
+        ids.append(index[token])
+    with open(tokens_path + ".tmp", 'wb') as out:
+        ids.tofile(out)
+
+    with codecs.open(vocab_path + ".tmp", 'w', 'utf-8') as f:
+        for word in vocab:
+            f.write(word + '\n')
+
+    # Only move the files into place once both are complete.
+    os.replace(vocab_path + ".tmp", vocab_path)
+    os.replace(tokens_path + ".tmp", tokens_path)
+
+
+def load(filename, cache_dir = DEFAULT_CACHE_DIR, sms = False):
+    """
+    Returns the tokens of <code>filename</code> as a CachedCorpus, building the cache first
+    if this corpus has not been seen before.
+
+    :param filename: The raw text file.
+    :param cache_dir: The directory holding the cached corpora.
+    :param sms: <code>true</code> if the file is the raw SMSSpamCollection, which needs cleaning.
+    """
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    key = content_hash(filename, sms)
+    tokens_path = os.path.join(cache_dir, key + ".tokens")
+    vocab_path = os.path.join(cache_dir, key + ".vocab")
+    if not (os.path.exists(tokens_path) and os.path.exists(vocab_path)):
+        build_cache(filename, tokens_path, vocab_path, sms)
+    return CachedCorpus(tokens_path, vocab_path)
+
+
+def main():
+    """
+    Parse command line arguments.
+    """
+    parser = argparse.ArgumentParser(description='Corpus cache')
+    parser.add_argument('--file', '-f', type=str, required=True, help='text file to tokenize and cache')
+    parser.add_argument('--cache-dir', '-c', type=str, default=DEFAULT_CACHE_DIR, help='directory in which to store the cache')
+    parser.add_argument('--sms', action='store_true', help='the file is the raw SMSSpamCollection and needs cleaning')
+
+    arguments = parser.parse_args()
+
+    corpus = load(arguments.file, arguments.cache_dir, arguments.sms)
+    print("Cached", len(corpus), "tokens,", len(corpus.vocab), "unique words")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#  -*- coding: utf-8 -*-
+import numpy as np
+
+"""
+A NumPy-backed vocabulary used by WordPredictor for the unigram and spell-check fallbacks.
+"""
+
+# Appended to a prefix to get an upper bound for all words starting with it.
+MAX_CHAR = "\U0010ffff"
+
+
+class VocabularyTable(object):
+    """
+    Holds the vocabulary as parallel arrays of words, identifiers and unigram counts,
+    sorted alphabetically. All words starting with a prefix then form one contiguous
+    range, found with a binary search, and the most frequent words in that range are
+    picked with a partial sort instead of sorting the whole vocabulary.
+
+    Ties in frequency are broken by identifier, i.e. the order in which words were added.
+    """
+    def __init__(self, unigram_count):
+        """
+        :param unigram_count: A dict from word to unigram count, in identifier order.
+        """
+        # The mapping from words to identifiers.
+        self.index = {}
+        for word in unigram_count:
+            self.index[word] = len(self.index)
+
+        words = np.array(list(unigram_count.keys()), dtype=str)
+        order = np.argsort(words, kind='stable')
+
+        # The words, sorted alphabetically.
+        self.words = words[order]
+
+        # The identifier of each word in self.words.
+        self.ids = order.astype(np.int64)
+
+        # The unigram count of each word in self.words.
+        self.counts = np.fromiter(unigram_count.values(), dtype=np.int64, count=len(order))[order]
+
+        # The position in self.words of each identifier.
+        self.position = np.empty(len(order), dtype=np.int64)
+        self.position[order] = np.arange(len(order))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, word):
+        return word in self.index
+
+    def increment(self, word):
+        """
+        Increments the unigram count of a word already in the vocabulary.
+        """
+        self.counts[self.position[self.index[word]]] += 1
+
+    def add(self, word, count = 1):
+        """
+        Adds a new word to the vocabulary.
+        """
+        if len(word) > self.words.dtype.itemsize // 4:
+            # Widen the array, or the new word would be truncated.
+            self.words = self.words.astype("<U{}".format(len(word)))
+        i = np.searchsorted(self.words, word)
+        word_id = len(self.index)
+        self.index[word] = word_id
+        self.words = np.insert(self.words, i, word)
+        self.ids = np.insert(self.ids, i, word_id)
+        self.counts = np.insert(self.counts, i, count)
+        self.position[self.position >= i] += 1
+        self.position = np.append(self.position, i)
+
+    def prefix_range(self, prefix):
+        """
+        Returns the range [lo, hi) of positions of the words that start with prefix.
+        """
+        if prefix == "":
+            return 0, len(self.words)
+        lo = np.searchsorted(self.words, prefix, side='left')
+        hi = np.searchsorted(self.words, prefix + MAX_CHAR, side='left')
+        return int(lo), int(hi)
+
+    def keys(self, positions):
+        """
+        Returns a ranking key for the words at the given positions (a slice or an array).
+        A larger key means a more frequent word; keys are unique.
+        """
+        return (self.counts[positions] << 32) - self.ids[positions]
+
+    def top_positions(self, keys, k = None):
+        """
+        Returns the indices of the k largest keys, from largest to smallest.
+        All indices are returned if k is None.
+        """
+        if k is None or k >= len(keys):
+            return np.argsort(-keys)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        best = np.argpartition(-keys, k - 1)[:k]
+        return best[np.argsort(-keys[best])]
+
+    def most_frequent(self, prefix = "", k = None):
+        """
+        Returns the k most frequent words starting with prefix, most frequent first.
+        All such words are returned if k is None.
+        """
+        lo, hi = self.prefix_range(prefix)
+        keys = self.keys(slice(lo, hi))
+        return self.words[lo + self.top_positions(keys, k)].tolist()
+
+    def rank(self, word, prefix = ""):
+        """
+        Returns the number of words starting with prefix that are more frequent than word,
+        i.e. the 0-based position of word in most_frequent(prefix).
+        """
+        lo, hi = self.prefix_range(prefix)
+        key = self.keys(self.position[self.index[word]])
+        return int(np.count_nonzero(self.keys(slice(lo, hi)) > key))
+
+    def most_frequent_of(self, words, k = None):
+        """
+        Returns the k most frequent of the given words, most frequent first.
+        Words that are not in the vocabulary are ignored.
+        """
+        ids = [self.index[w] for w in words if w in self.index]
+        positions = self.position[np.array(ids, dtype=np.int64)]
+        return self.words[positions[self.top_positions(self.keys(positions), k)]].tolist()